@@ -3,17 +3,21 @@ import os
 import sqlite3
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 
 # Import our modules
 from src.database import Database
 from src.data_processor import DataProcessor
 from src.winner_manager import WinnerManager
+from src.draw_audit import DrawAudit
+from ui.components.winner_tables import (
+    DUPLICATE_STYLE, mark_all_duplicates, mark_round_duplicates, show_winner_table
+)
 
 # Initialize the system
 database = Database()
 data_processor = DataProcessor(database)
 winner_manager = WinnerManager(database)
+draw_audit = DrawAudit(database)
 
 # Fix missing import in data_processor.py
 import sqlite3
@@ -29,7 +33,8 @@ def main():
         "Import Data", 
         "Select Winners", 
         "View Winners", 
-        "Export Winners"
+        "Export Winners",
+        "Lookup"
     ])
     
     if page == "Import Data":
@@ -43,6 +48,9 @@ def main():
     
     elif page == "Export Winners":
         export_winners_page()
+    
+    elif page == "Lookup":
+        lookup_page()
 
 def get_latest_draw_number():
     """Get the latest draw number from the database."""
@@ -89,50 +97,44 @@ def import_data_page():
         if not whatsapp_file or not post_file:
             st.warning("Please upload both SMS data and Post winners files.")
         else:
-            # Save uploaded files temporarily
-            temp_sms_file = f"data/temp_sms_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
-            temp_post_file = f"data/temp_post_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
-            
-            with open(temp_sms_file, "wb") as f:
-                f.write(whatsapp_file.getbuffer())
-            with open(temp_post_file, "wb") as f:
-                f.write(post_file.getbuffer())
-            
-            # Import SMS data
-            sms_success, sms_message = data_processor.import_whatsapp_data(temp_sms_file, round_number)
+            # Parse the uploads straight from memory
+            sms_success, sms_message = data_processor.import_whatsapp_data(whatsapp_file, round_number)
             if not sms_success:
                 st.error(f"SMS Data Import Failed: {sms_message}")
-                # Clean up temp files
-                if os.path.exists(temp_sms_file):
-                    os.remove(temp_sms_file)
-                if os.path.exists(temp_post_file):
-                    os.remove(temp_post_file)
                 return
             
             # Import Post winners
-            post_success, post_message = data_processor.import_post_winners(temp_post_file, round_number)
+            post_success, post_message = data_processor.import_post_winners(post_file, round_number)
             if not post_success:
                 st.error(f"Post Winners Import Failed: {post_message}")
-                # Clean up temp files
-                if os.path.exists(temp_sms_file):
-                    os.remove(temp_sms_file)
-                if os.path.exists(temp_post_file):
-                    os.remove(temp_post_file)
                 return
             
             # If both imports are successful, show success message
             st.success(f"SMS Data Import: {sms_message}")
             st.success(f"Post Winners Import: {post_message}")
+
+            # Keep the skipped rows of this import so the download buttons
+            # below survive the rerun each download triggers
+            reports = st.session_state.setdefault("rejection_reports", {})
+            for source in ("WhatsApp", "Post"):
+                reports[(round_number, source)] = data_processor.get_rejection_report_csv(source)
             
             # Increment the Draw number for the next round
             next_draw = round_number + 1
             st.info(f"Next Draw Number: {next_draw} (for the next import)")
-            
-            # Clean up temp files
-            if os.path.exists(temp_sms_file):
-                os.remove(temp_sms_file)
-            if os.path.exists(temp_post_file):
-                os.remove(temp_post_file)
+    
+    # Offer the rows that were skipped for review
+    reports = st.session_state.get("rejection_reports", {})
+    for source, label in [("WhatsApp", "SMS"), ("Post", "Post Winners")]:
+        report_csv = reports.get((round_number, source))
+        if report_csv is not None:
+            st.download_button(
+                label=f"Download {label} Rejection Report",
+                data=report_csv,
+                file_name=f"round_{round_number}_{source.lower()}_rejections.csv",
+                mime="text/csv",
+                key=f"rejections_{round_number}_{source}"
+            )
 
 
 def select_winners_page():
@@ -157,189 +159,154 @@ def select_winners_page():
             st.success(message)
         else:
             st.error(message)
+    
+    st.markdown("---")
+    
+    # Draw audit log - prove how each draw happened
+    st.subheader("Draw Audit")
+    
+    if st.button("Verify Audit Log"):
+        success, message = draw_audit.verify_chain()
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+    
+    # Re-hash every entry from the start instead of trusting the last checkpoint
+    if st.button("Full Verification"):
+        success, message = draw_audit.verify_chain(full=True)
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+    
+    audit_id = st.number_input("Draw Audit Number", min_value=1, value=1, step=1)
+    if st.button("Replay Draw"):
+        success, message = draw_audit.verify_draw(audit_id)
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+
+def get_last_winner_id():
+    """Get the id of the newest winner row (0 when nobody has won yet)."""
+    conn = sqlite3.connect(database.db_path)
+    result = conn.execute("SELECT MAX(id) FROM winners").fetchone()[0]
+    conn.close()
+    return result or 0
+
+@st.cache_data(max_entries=20)
+def load_round_winners(round_number, last_winner_id):
+    """Winners of a round with their duplicate columns.
+    
+    last_winner_id is only part of the cache key: a new draw or Post import
+    changes it, so the marked table is rebuilt only when winners change and
+    page flips just slice the cached frame.
+    """
+    # Modified query to get only winners from the specified round
+    query = '''
+        SELECT p.mobile_number, p.unique_code, p.message, p.source, w.round_number
+        FROM participants p
+        JOIN winners w ON p.id = w.participant_id
+        WHERE w.round_number = ?
+        ORDER BY p.source
+    '''
+    
+    conn = sqlite3.connect(database.db_path)
+    winners_df = pd.read_sql_query(query, conn, params=[round_number])
+    if winners_df.empty:
+        conn.close()
+        return winners_df
+    
+    # Get all winners from all rounds to check for duplicates
+    all_rounds_query = '''
+        SELECT p.mobile_number, p.unique_code, w.round_number
+        FROM participants p
+        JOIN winners w ON p.id = w.participant_id
+        ORDER BY w.round_number
+    '''
+    all_winners = pd.read_sql_query(all_rounds_query, conn)
+    conn.close()
+    
+    # Add columns for duplicate tracking
+    return mark_round_duplicates(winners_df, all_winners, round_number)
+
+@st.cache_data(max_entries=5)
+def load_all_winners(last_winner_id):
+    """Winners of every round with their duplicate columns, cached like load_round_winners."""
+    query = '''
+        SELECT p.mobile_number, p.unique_code, p.message, p.source, w.round_number
+        FROM participants p
+        JOIN winners w ON p.id = w.participant_id
+        ORDER BY w.round_number, p.source
+    '''
+    
+    conn = sqlite3.connect(database.db_path)
+    all_winners_df = pd.read_sql_query(query, conn)
+    conn.close()
+    
+    if all_winners_df.empty:
+        return all_winners_df
+    # Mark winners sharing a mobile number or unique code
+    return mark_all_duplicates(all_winners_df)
 
 def view_winners_page():
     st.header("View All Winners")
     
     round_number = st.number_input("Drow Number", min_value=1, value=1, step=1)
     
+    # Remember which table is open so paging through it survives reruns
+    col1, col2 = st.columns(2)
+    col1.button("Show Winners", on_click=st.session_state.update, kwargs={"view_round": round_number})
+    col2.button("Hide Winners", on_click=st.session_state.pop, args=("view_round", None))
+    
     # Using rows instead of columns for better table visibility
-    if st.button("Show Winners"):
-        # Modified query to get only winners from the specified round
-        query = '''
-            SELECT p.mobile_number, p.unique_code, p.message, p.source, w.round_number
-            FROM participants p
-            JOIN winners w ON p.id = w.participant_id
-            WHERE w.round_number = ?
-            ORDER BY p.source
-        '''
-        
-        conn = sqlite3.connect(database.db_path)
-        winners_df = pd.read_sql_query(query, conn, params=[round_number])
-        conn.close()
+    if st.session_state.get("view_round") == round_number:
+        winners_df = load_round_winners(round_number, get_last_winner_id())
         
         if winners_df.empty:
             st.warning(f"No winners found for Round {round_number}.")
         else:
-            # Get all winners from all rounds to check for duplicates
-            all_rounds_query = '''
-                SELECT p.mobile_number, p.unique_code, w.round_number
-                FROM participants p
-                JOIN winners w ON p.id = w.participant_id
-                ORDER BY w.round_number
-            '''
-            conn = sqlite3.connect(database.db_path)
-            all_winners = pd.read_sql_query(all_rounds_query, conn)
-            conn.close()
-            
-            # Add columns for duplicate tracking
-            winners_df['is_duplicate'] = False
-            winners_df['previous_rounds'] = ''
-            winners_df['duplicate_reason'] = ''
-            
-            for idx, row in winners_df.iterrows():
-                # Check for mobile number duplicates (same mobile, different code)
-                mobile_matches = all_winners[
-                    (all_winners['mobile_number'] == row['mobile_number']) & 
-                    (all_winners['round_number'] != round_number)
-                ]
-                
-                # Check for unique code duplicates (same code, different mobile)
-                code_matches = all_winners[
-                    (all_winners['unique_code'] == row['unique_code']) & 
-                    (all_winners['round_number'] != round_number)
-                ]
-                
-                # If there are occurrences in other rounds
-                mobile_dup_rounds = mobile_matches['round_number'].tolist()
-                code_dup_rounds = code_matches['round_number'].tolist()
-                
-                # Combine all duplicate rounds
-                all_dup_rounds = sorted(list(set(mobile_dup_rounds + code_dup_rounds)))
-                
-                if all_dup_rounds:
-                    winners_df.at[idx, 'is_duplicate'] = True
-                    winners_df.at[idx, 'previous_rounds'] = ', '.join(map(str, all_dup_rounds))
-                    
-                    # Add reason for duplication
-                    reasons = []
-                    if mobile_dup_rounds:
-                        reasons.append(f"Same mobile in rounds: {', '.join(map(str, mobile_dup_rounds))}")
-                    if code_dup_rounds:
-                        reasons.append(f"Same code in rounds: {', '.join(map(str, code_dup_rounds))}")
-                    
-                    winners_df.at[idx, 'duplicate_reason'] = "; ".join(reasons)
-            
             st.write(f"Total Winners in Round {round_number}: {len(winners_df)}")
-            st.write(f"SMS Winners: {len(winners_df[winners_df['source'] == 'WhatsApp'])}")
-            st.write(f"Post Winners: {len(winners_df[winners_df['source'] == 'Post'])}")
-            st.write(f"Duplicate Winners: {len(winners_df[winners_df['is_duplicate']])}")
+            st.write(f"SMS Winners: {(winners_df['source'] == 'WhatsApp').sum()}")
+            st.write(f"Post Winners: {(winners_df['source'] == 'Post').sum()}")
+            st.write(f"Duplicate Winners: {winners_df['is_duplicate'].sum()}")
             
             # Highlight duplicates in the DataFrame
-            st.dataframe(
-                winners_df.style.apply(
-                    lambda x: ['background-color: #8a64d6' if x['is_duplicate'] else '' for _ in x], 
-                    axis=1
-                )
-            )
+            show_winner_table(winners_df, key="round_winners")
     
     # Add a separator line
     st.markdown("---")
     
     # All Winners section below
-    if st.button("Show All Winners"):
-        # Get winners from all rounds
-        query = '''
-            SELECT p.mobile_number, p.unique_code, p.message, p.source, w.round_number
-            FROM participants p
-            JOIN winners w ON p.id = w.participant_id
-            ORDER BY w.round_number, p.source
-        '''
-        
-        conn = sqlite3.connect(database.db_path)
-        all_winners_df = pd.read_sql_query(query, conn)
-        conn.close()
+    col1, col2 = st.columns(2)
+    col1.button("Show All Winners", on_click=st.session_state.update, kwargs={"view_all_winners": True})
+    col2.button("Hide All Winners", on_click=st.session_state.pop, args=("view_all_winners", None))
+    
+    if st.session_state.get("view_all_winners"):
+        display_df = load_all_winners(get_last_winner_id())
         
-        if all_winners_df.empty:
+        if display_df.empty:
             st.warning("No winners found in any round.")
         else:
-            # Create a duplicate detection DataFrame
-            display_df = all_winners_df.copy()
-            display_df['is_duplicate'] = False
-            display_df['duplicate_reason'] = ""
-            
-            # Check for mobile number duplicates
-            mobile_duplicates = display_df[display_df.duplicated(subset=['mobile_number'], keep=False)]
-            mobile_groups = mobile_duplicates.groupby('mobile_number')
-            
-            # Check for unique code duplicates
-            code_duplicates = display_df[display_df.duplicated(subset=['unique_code'], keep=False)]
-            code_groups = code_duplicates.groupby('unique_code')
-            
-            # Mark mobile number duplicates
-            for mobile, group in mobile_groups:
-                rounds = group['round_number'].tolist()
-                for index in group.index:
-                    display_df.at[index, 'is_duplicate'] = True
-                    current_round = display_df.at[index, 'round_number']
-                    other_rounds = [r for r in rounds if r != current_round]
-                    
-                    if other_rounds:
-                        reason = f"Same mobile in round(s): {', '.join(map(str, other_rounds))}"
-                        if display_df.at[index, 'duplicate_reason']:
-                            display_df.at[index, 'duplicate_reason'] += "; " + reason
-                        else:
-                            display_df.at[index, 'duplicate_reason'] = reason
-            
-            # Mark unique code duplicates
-            for code, group in code_groups:
-                rounds = group['round_number'].tolist()
-                for index in group.index:
-                    display_df.at[index, 'is_duplicate'] = True
-                    current_round = display_df.at[index, 'round_number']
-                    other_rounds = [r for r in rounds if r != current_round]
-                    
-                    if other_rounds:
-                        reason = f"Same code in round(s): {', '.join(map(str, other_rounds))}"
-                        if display_df.at[index, 'duplicate_reason']:
-                            display_df.at[index, 'duplicate_reason'] += "; " + reason
-                        else:
-                            display_df.at[index, 'duplicate_reason'] = reason
-            
             # Display counts
-            st.write(f"Total Winners Across All Rounds: {len(all_winners_df)}")
-            st.write(f"Duplicate Winners (same mobile or same code): {len(display_df[display_df['is_duplicate']])}")
+            st.write(f"Total Winners Across All Rounds: {len(display_df)}")
+            st.write(f"Duplicate Winners (same mobile or same code): {display_df['is_duplicate'].sum()}")
             
             # Create two dataframes - one for clean winners, one for duplicates
             clean_df = display_df[~display_df['is_duplicate']].drop(columns=['is_duplicate', 'duplicate_reason'])
             duplicates_df = display_df[display_df['is_duplicate']]
             
-            # Show duplicates with highlighting
+            # Show duplicates with red text
             if not duplicates_df.empty:
                 st.subheader("⚠️ Duplicate Winners (Same Mobile Number OR Same Unique Code)")
-                st.markdown("""
-                <style>
-                .duplicate-winner {
-                    color: red;
-                    font-weight: bold;
-                }
-                </style>
-                """, unsafe_allow_html=True)
-                
-                # Display duplicates with HTML formatting for red text
-                for _, row in duplicates_df.iterrows():
-                    st.markdown(
-                        f"<div class='duplicate-winner'>Round {row['round_number']} - "
-                        f"{row['mobile_number']} (Code: {row['unique_code']}) - {row['duplicate_reason']}</div>", 
-                        unsafe_allow_html=True
-                    )
-                
-                st.dataframe(duplicates_df)
+                show_winner_table(duplicates_df, key="duplicate_winners", style=DUPLICATE_STYLE)
             
             # Show clean winners
             if not clean_df.empty:
                 st.subheader("Clean Winners (No Duplications)")
-                st.dataframe(clean_df)
+                show_winner_table(clean_df, key="clean_winners")
+
 def export_winners_page():
     st.header("Export Winners to Excel")
     
@@ -401,5 +368,57 @@ def export_winners_page():
         else:
             st.error(result)  # Display the error message
 
+def lookup_page():
+    st.header("Participant Lookup")
+    
+    search_by = st.radio("Search By", ["Mobile Number", "Unique Code", "Message Keywords"], horizontal=True)
+    term = st.text_input("Search Term")
+    prefix = False
+    if search_by != "Message Keywords":
+        prefix = st.checkbox("Match as prefix (starts with)")
+    page_size = st.selectbox("Results per page", [25, 50, 100], index=1)
+    
+    # Keep a stack of page cursors so the user can move back and forth
+    # without re-scanning earlier pages
+    search_key = (search_by, term, prefix, page_size)
+    if st.session_state.get("lookup_key") != search_key:
+        st.session_state["lookup_key"] = search_key
+        st.session_state["lookup_cursors"] = [None]
+    cursors = st.session_state["lookup_cursors"]
+    
+    if not term.strip():
+        st.info("Enter a mobile number, unique code or keywords to search.")
+        return
+    
+    if search_by == "Message Keywords":
+        rows, next_cursor = database.search_messages(term, page_size=page_size, after=cursors[-1])
+    else:
+        field = "mobile_number" if search_by == "Mobile Number" else "unique_code"
+        rows, next_cursor = database.lookup_participants(
+            term, field=field, prefix=prefix, page_size=page_size, after=cursors[-1]
+        )
+    
+    if not rows:
+        st.warning("No participants found.")
+        return
+    
+    results_df = pd.DataFrame(rows, columns=[
+        "id", "mobile_number", "unique_code", "message", "source", "round_number", "won_rounds"
+    ])
+    results_df["won_rounds"] = results_df["won_rounds"].fillna("")
+    
+    st.write(f"Page {len(cursors)} - showing {len(results_df)} result(s)")
+    st.dataframe(results_df)
+    
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if len(cursors) > 1 and st.button("Previous Page"):
+            cursors.pop()
+            st.experimental_rerun()
+    with col_next:
+        if next_cursor is not None and st.button("Next Page"):
+            cursors.append(next_cursor)
+            st.experimental_rerun()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,65 +1,198 @@
 import pandas as pd
 import sqlite3
 import os
+import io
+import shutil
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 
+# Uploads larger than this are spooled to disk when they have to be copied
+SPOOL_THRESHOLD = 64 * 1024 * 1024
+
+REQUIRED_COLUMNS = ["mobile number", "Unique Code", "SMS"]
+MOBILE_PATTERN = r'\+?\d{9,15}'
+COUNTRY_CODE = '94'
+CODE_PATTERN = r'[A-Za-z0-9_-]+'
+
+
+def _normalize_text(series):
+    """Convert a sheet column to stripped text, with blanks for missing cells.
+    
+    Whole-number columns (read as floats when cells are blank) are converted
+    through Int64 so they lose the '.0' suffix without a regex pass.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.dropna()
+        if (values == values.round()).all():
+            return series.astype('Int64').astype(str).where(series.notna(), '')
+    
+    text = series.astype(str).str.strip()
+    float_like = text.str.endswith('.0')
+    if float_like.any():
+        text[float_like] = text[float_like].str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+    return text.where(series.notna(), '')
+
+
+def _canonical_mobile(mobile):
+    """Bring mobile numbers to one form, with the country code and no '+'.
+    
+    '+94771234567', '0771234567' and a numeric cell that lost its leading
+    zero (771234567) all become '94771234567'.
+    """
+    digits = mobile.str.replace(r'^\+', '', regex=True)
+    lengths = digits.str.len()
+    local = lengths == 9
+    trunk = (lengths == 10) & digits.str.startswith('0')
+    digits = digits.mask(local, COUNTRY_CODE + digits)
+    return digits.mask(trunk, COUNTRY_CODE + digits.str[1:])
+
+
 class DataProcessor:
     def __init__(self, database):
         self.database = database
         # Ensure directories exist
         os.makedirs('data', exist_ok=True)
         os.makedirs('exports', exist_ok=True)
+        # Rows skipped by the last import of each source, for download
+        self.rejection_reports = {}
+        
+    @contextmanager
+    def _open_source(self, source):
+        """Yield something pd.read_excel can parse without extra copies.
+        
+        Paths are passed through, raw buffers are wrapped in BytesIO and
+        seekable in-memory uploads are parsed in place. Only streams that
+        cannot be rewound are copied, into a SpooledTemporaryFile that stays
+        in memory up to SPOOL_THRESHOLD bytes.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            yield source
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            yield io.BytesIO(source)
+        elif hasattr(source, 'seekable') and source.seekable():
+            source.seek(0)
+            yield source
+        else:
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD) as spool:
+                shutil.copyfileobj(source, spool)
+                spool.seek(0)
+                yield spool
+    
+    def _read_excel(self, source):
+        """Read an Excel sheet from a path, buffer or file-like object."""
+        with self._open_source(source) as excel_source:
+            return pd.read_excel(excel_source)
+    
+    def validate_entries(self, df, require_message=True):
+        """Classify every sheet row as accepted, rejected or duplicate.
+        
+        Works on whole columns: values are normalized to text, each rule
+        builds a boolean mask and rejection reasons are joined per row. Valid
+        mobile numbers are then brought to one canonical form, and rows that
+        repeat an earlier valid (mobile number, code) pair in the same sheet
+        are marked duplicate. Post winners do not need an SMS, so
+        require_message=False skips that rule. Returns a DataFrame with the
+        entered and canonical mobile number, unique_code and message plus
+        row, status and reason.
+        """
+        mobile = _normalize_text(df["mobile number"])
+        if not pd.api.types.is_numeric_dtype(df["mobile number"]):
+            mobile = mobile.str.replace(r'[\s-]', '', regex=True)
+        code = _normalize_text(df["Unique Code"])
+        message = df["SMS"].astype(str).str.strip().where(df["SMS"].notna(), '')
+        
+        checks = [
+            (mobile == '', "Blank mobile number"),
+            ((mobile != '') & ~mobile.str.fullmatch(MOBILE_PATTERN), "Malformed mobile number"),
+            (code == '', "Blank unique code"),
+            ((code != '') & ~code.str.fullmatch(CODE_PATTERN), "Malformed unique code"),
+        ]
+        if require_message:
+            checks.append((message == '', "Missing SMS"))
+        # Only rows failing a rule get their reason string touched
+        reason = pd.Series('', index=df.index, dtype=object)
+        for mask, text in checks:
+            reason[mask] = reason[mask] + '; ' + text
+        rejected = reason != ''
+        reason[rejected] = reason[rejected].str[2:]
         
-    def import_whatsapp_data(self, file_path, round_number):
-        """Import WhatsApp SMS data from Excel sheet."""
+        entries = pd.DataFrame({
+            'row': df.index + 2,  # Excel row number, after the header row
+            'entered_mobile': mobile,
+            'mobile_number': mobile.where(rejected, _canonical_mobile(mobile)),
+            'unique_code': code,
+            'message': message,
+        })
+        duplicate = pd.Series(False, index=df.index)
+        duplicate[~rejected] = entries.loc[~rejected, ['mobile_number', 'unique_code']].duplicated()
+        
+        entries['status'] = 'accepted'
+        entries.loc[rejected, 'status'] = 'rejected'
+        entries.loc[duplicate, 'status'] = 'duplicate'
+        entries['reason'] = reason.mask(duplicate, "Duplicate of an earlier row in this sheet")
+        return entries
+    
+    def _import_sheet(self, source, round_number, participant_source, as_winners):
+        """Validate a sheet and bulk insert its accepted rows.
+        
+        Returns (imported, rejected, duplicates). The rejection report is kept
+        in self.rejection_reports[participant_source].
+        """
+        df = self._read_excel(source)
+        for col in REQUIRED_COLUMNS:
+            if col not in df.columns:
+                raise ValueError(f"Required column '{col}' not found in the sheet.")
+        
+        entries = self.validate_entries(df, require_message=not as_winners)
+        accepted = entries[entries['status'] == 'accepted']
+        imported = self.database.add_participants(
+            zip(accepted['mobile_number'].tolist(), accepted['unique_code'].tolist(),
+                accepted['message'].tolist()),
+            participant_source,
+            round_number,
+            as_winners=as_winners
+        )
+        
+        # Report the cleaned text rather than raw cells (a numeric mobile
+        # would otherwise show as 94771234567.0)
+        report = entries.loc[entries['status'] != 'accepted'].rename(columns={
+            'entered_mobile': 'mobile number',
+            'mobile_number': 'normalized mobile number',
+            'unique_code': 'Unique Code',
+            'message': 'SMS',
+        })
+        self.rejection_reports[participant_source] = report
+        
+        duplicates = int((report['status'] == 'duplicate').sum())
+        return imported, len(report) - duplicates, duplicates
+    
+    def get_rejection_report_csv(self, participant_source):
+        """Get the rejection report of the last import from a source as CSV bytes."""
+        report = self.rejection_reports.get(participant_source)
+        if report is None or report.empty:
+            return None
+        return report.to_csv(index=False).encode('utf-8')
+    
+    def import_whatsapp_data(self, source, round_number):
+        """Import WhatsApp SMS data from an Excel sheet path, buffer or file-like upload."""
         try:
-            df = pd.read_excel(file_path)
-            required_columns = ["mobile number", "Unique Code", "SMS"]
-            
-            # Check if required columns exist
-            for col in required_columns:
-                if col not in df.columns:
-                    return False, f"Required column '{col}' not found in the WhatsApp sheet."
-            
-            # Save to database
-            for _, row in df.iterrows():
-                self.database.add_participant(
-                    row["mobile number"],
-                    row["Unique Code"],
-                    row["SMS"],
-                    "WhatsApp",
-                    round_number
-                )
-                
-            return True, f"Successfully imported {len(df)} WhatsApp participants for round {round_number}."
+            imported, rejected, duplicates = self._import_sheet(source, round_number, "WhatsApp", False)
+            return True, (
+                f"Successfully imported {imported} WhatsApp participants for round {round_number} "
+                f"({rejected} rejected, {duplicates} duplicates in sheet)."
+            )
         except Exception as e:
             return False, f"Error importing WhatsApp data: {str(e)}"
     
-    def import_post_winners(self, file_path, round_number):
-        """Import already selected winners from Post."""
+    def import_post_winners(self, source, round_number):
+        """Import already selected winners from Post (path, buffer or file-like upload)."""
         try:
-            df = pd.read_excel(file_path)
-            required_columns = ["mobile number", "Unique Code", "SMS"]
-            
-            # Check if required columns exist
-            for col in required_columns:
-                if col not in df.columns:
-                    return False, f"Required column '{col}' not found in the Post winners sheet."
-            
-            # Save to database
-            for _, row in df.iterrows():
-                participant_id = self.database.add_participant(
-                    row["mobile number"],
-                    row["Unique Code"],
-                    row["SMS"],
-                    "Post",
-                    round_number
-                )
-                
-                # Add to winners table
-                self.database.add_winner(participant_id, round_number, "Post")
-            
-            return True, f"Successfully imported {len(df)} Post winners for round {round_number}."
+            imported, rejected, duplicates = self._import_sheet(source, round_number, "Post", True)
+            return True, (
+                f"Successfully imported {imported} Post winners for round {round_number} "
+                f"({rejected} rejected, {duplicates} duplicates in sheet)."
+            )
         except Exception as e:
             return False, f"Error importing Post winners: {str(e)}"
     
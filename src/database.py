@@ -1,68 +1,263 @@
 
 import sqlite3
 import os
+import json
+import queue
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 
+from src.draw_audit import GENESIS_HASH, digest_ids, entry_hash
+
+# Seconds a connection waits on a lock held by another process
+BUSY_TIMEOUT = 30
+
+
+class StaleDrawError(Exception):
+    """Raised when a draw was computed from an out-of-date eligibility snapshot."""
+
+
+class WriteQueue:
+    """Serialize every write to one SQLite file through a single connection.
+    
+    Jobs are callables taking the writer connection. Each one runs in its own
+    BEGIN IMMEDIATE transaction on a dedicated thread and is committed, or
+    rolled back if it raises. Readers open their own connections and are
+    served concurrently from WAL snapshots.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._jobs = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"sqlite-writer:{db_path}", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+    
+    def submit(self, job):
+        """Run job(conn) on the writer thread and return its result."""
+        future = Future()
+        self._jobs.put((job, future))
+        return future.result()
+    
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._ready.set()
+        
+        while True:
+            job, future = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = job(conn)
+                conn.execute("COMMIT")
+            except BaseException as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+# One writer per database file, shared by every Database instance in the process
+# (Streamlit builds a new Database on each script run of each session)
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+
+
+def get_write_queue(db_path):
+    """Return the process-wide WriteQueue for db_path, starting it if needed.
+    
+    A new queue creates the schema before it is handed out.
+    """
+    key = os.path.abspath(db_path)
+    with _write_queues_lock:
+        if key not in _write_queues:
+            writer = WriteQueue(key)
+            writer.submit(create_schema)
+            _write_queues[key] = writer
+        return _write_queues[key]
+
+
+def create_schema(conn):
+    """Create the tables, indexes and triggers if they do not exist yet."""
+    cursor = conn.cursor()
+
+    # Table for all participants (both WhatsApp and Post)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS participants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            mobile_number TEXT,
+            unique_code TEXT,
+            message TEXT,
+            source TEXT,
+            round_number INTEGER,
+            date_added TIMESTAMP
+        )
+    ''')
+
+    # Table for winners
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS winners (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            participant_id INTEGER,
+            round_number INTEGER,
+            source TEXT,
+            selection_date TIMESTAMP,
+            FOREIGN KEY (participant_id) REFERENCES participants (id)
+        )
+    ''')
+
+    # Indexes for exact and prefix lookup of mobile numbers and codes
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_participants_mobile
+        ON participants (mobile_number)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_participants_code
+        ON participants (unique_code)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_winners_participant
+        ON winners (participant_id)
+    ''')
+
+    # Full-text index over participant messages. Triggers keep it in sync,
+    # so every row written by the importers is searchable immediately.
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'participants_fts'"
+    )
+    fts_exists = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS participants_fts
+        USING fts5(message, content='participants', content_rowid='id')
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS participants_fts_insert
+        AFTER INSERT ON participants BEGIN
+            INSERT INTO participants_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS participants_fts_delete
+        AFTER DELETE ON participants BEGIN
+            INSERT INTO participants_fts (participants_fts, rowid, message)
+            VALUES ('delete', old.id, old.message);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS participants_fts_update
+        AFTER UPDATE OF message ON participants BEGIN
+            INSERT INTO participants_fts (participants_fts, rowid, message)
+            VALUES ('delete', old.id, old.message);
+            INSERT INTO participants_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    ''')
+    if not fts_exists:
+        # Index participants imported before the search index existed
+        cursor.execute("INSERT INTO participants_fts (participants_fts) VALUES ('rebuild')")
+
+    # Version per round, bumped whenever its participants or winners
+    # change. Draws compare it before committing to reject stale picks.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS draw_versions (
+            round_number INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    for table in ("participants", "winners"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_draw_version
+            AFTER INSERT ON {table} BEGIN
+                INSERT INTO draw_versions (round_number, version)
+                VALUES (new.round_number, 1)
+                ON CONFLICT (round_number) DO UPDATE SET version = version + 1;
+            END
+        ''')
+
+    # Append-only, hash-chained record of every random draw
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS draw_audit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            round_number INTEGER NOT NULL,
+            seed INTEGER NOT NULL,
+            eligible_count INTEGER NOT NULL,
+            eligible_digest TEXT NOT NULL,
+            params TEXT NOT NULL,
+            winner_ids TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            prev_hash TEXT NOT NULL,
+            entry_hash TEXT NOT NULL
+        )
+    ''')
+    for action in ("UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS draw_audit_no_{action.lower()}
+            BEFORE {action} ON draw_audit BEGIN
+                SELECT RAISE(ABORT, 'draw_audit is append-only');
+            END
+        ''')
+
+    # Last audit entry whose chain was verified, so checks can resume there
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS draw_audit_checkpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            audit_id INTEGER NOT NULL,
+            entry_hash TEXT NOT NULL
+        )
+    ''')
+
+
 class Database:
     def __init__(self, db_path="database/contest_winners.db"):
         # Ensure directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.db_path = db_path
-        self.initialize_database()
+        # The schema is created once, when the process first opens this file,
+        # so constructing a Database never waits behind queued writes
+        self.writer = get_write_queue(db_path)
         
     def initialize_database(self):
         """Initialize the SQLite database with required tables."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Table for all participants (both WhatsApp and Post)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS participants (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                mobile_number TEXT,
-                unique_code TEXT,
-                message TEXT,
-                source TEXT,
-                round_number INTEGER,
-                date_added TIMESTAMP
-            )
-        ''')
-        
-        # Table for winners
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS winners (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                participant_id INTEGER,
-                round_number INTEGER,
-                source TEXT,
-                selection_date TIMESTAMP,
-                FOREIGN KEY (participant_id) REFERENCES participants (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        self.writer.submit(create_schema)
+    
+    def connect(self):
+        """Open a read connection; under WAL it sees a consistent snapshot."""
+        return sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
     
     def execute_query(self, query, params=None):
-        """Execute a query and return the results."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Execute a query and return the results.
         
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+        Reads run on a fresh connection. Anything else is sent through the
+        shared write queue.
+        """
+        def run(conn):
+            cursor = conn.cursor()
             
-        conn.commit()
-        last_id = cursor.lastrowid
-        
-        try:
-            results = cursor.fetchall()
-        except sqlite3.Error:
-            results = []
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
             
-        conn.close()
-        return results, last_id
+            try:
+                results = cursor.fetchall()
+            except sqlite3.Error:
+                results = []
+            return results, cursor.lastrowid
+        
+        if query.lstrip().upper().startswith(("SELECT", "WITH")):
+            conn = self.connect()
+            try:
+                return run(conn)
+            finally:
+                conn.close()
+        
+        return self.writer.submit(run)
     
     def add_participant(self, mobile_number, unique_code, message, source, round_number):
         """Add a new participant to the database."""
@@ -75,6 +270,37 @@ class Database:
         _, participant_id = self.execute_query(query, params)
         return participant_id
     
+    def add_participants(self, entries, source, round_number, as_winners=False):
+        """Bulk insert (mobile_number, unique_code, message) entries in one transaction.
+
+        With as_winners=True every inserted participant is also recorded as a
+        winner of the round, as the Post import needs. Returns the row count.
+        """
+        def run(conn):
+            date_added = datetime.now()
+            # The single writer makes the new AUTOINCREMENT ids follow this one
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM participants").fetchone()[0]
+            cursor = conn.executemany(
+                '''
+                INSERT INTO participants
+                (mobile_number, unique_code, message, source, round_number, date_added)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                ((mobile, code, message, source, round_number, date_added)
+                 for mobile, code, message in entries)
+            )
+            if as_winners:
+                conn.execute(
+                    '''
+                    INSERT INTO winners (participant_id, round_number, source, selection_date)
+                    SELECT id, round_number, source, ? FROM participants WHERE id > ?
+                    ''',
+                    (date_added, last_id)
+                )
+            return cursor.rowcount
+
+        return self.writer.submit(run)
+
     def add_winner(self, participant_id, round_number, source):
         """Add a participant as a winner."""
         query = '''
@@ -85,6 +311,162 @@ class Database:
         params = (participant_id, round_number, source, datetime.now())
         self.execute_query(query, params)
     
+    def iter_eligible_ids(self, round_number, last_participant_id, last_winner_id, conn=None):
+        """Yield, in id order, the WhatsApp participants of a round who could win.
+        
+        Only participants and winners up to the given ids are considered, so
+        the same set can be rebuilt later to replay a draw. A participant is
+        excluded if their (mobile number, unique code) pair has already won.
+        """
+        query = '''
+            SELECT p.id FROM participants p
+            WHERE p.round_number = ? AND p.source = 'WhatsApp' AND p.id <= ?
+            AND NOT EXISTS (
+                SELECT 1 FROM participants q
+                JOIN winners w ON w.participant_id = q.id
+                WHERE q.mobile_number = p.mobile_number AND q.unique_code = p.unique_code
+                AND w.id <= ?
+            )
+            ORDER BY p.id
+        '''
+        own_conn = conn is None
+        if own_conn:
+            conn = self.connect()
+        try:
+            for (participant_id,) in conn.execute(query, (round_number, last_participant_id, last_winner_id)):
+                yield participant_id
+        finally:
+            if own_conn:
+                conn.close()
+    
+    def get_draw_snapshot(self, round_number):
+        """Read everything a draw needs from one consistent WAL snapshot.
+        
+        Returns a dict with the round's draw version, the highest participant
+        and winner ids, the sorted eligible ids and their count and digest.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT version FROM draw_versions WHERE round_number = ?", (round_number,)
+            ).fetchone()
+            last_participant_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM participants").fetchone()[0]
+            last_winner_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM winners").fetchone()[0]
+            
+            eligible_ids = list(self.iter_eligible_ids(
+                round_number, last_participant_id, last_winner_id, conn=conn
+            ))
+            eligible_count, eligible_digest = digest_ids(eligible_ids)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        
+        return {
+            'version': row[0] if row else 0,
+            'last_participant_id': last_participant_id,
+            'last_winner_id': last_winner_id,
+            'eligible_ids': eligible_ids,
+            'eligible_count': eligible_count,
+            'eligible_digest': eligible_digest,
+        }
+    
+    def commit_draw(self, round_number, expected_version, participant_ids, source, audit=None):
+        """Atomically record a draw if the round is still at expected_version.
+        
+        Raises StaleDrawError when another draw or import touched the round
+        after the caller read its eligibility snapshot, or when a selected
+        (mobile number, unique code) pair has won in any round since. When an audit dict
+        (seed, eligible_count, eligible_digest, params) is given, the draw is
+        appended to the draw_audit hash chain in the same transaction and the
+        new audit id is returned.
+        """
+        def run(conn):
+            row = conn.execute(
+                "SELECT version FROM draw_versions WHERE round_number = ?", (round_number,)
+            ).fetchone()
+            current_version = row[0] if row else 0
+            if current_version != expected_version:
+                raise StaleDrawError(
+                    f"Round {round_number} changed while winners were being selected "
+                    f"(version {expected_version} -> {current_version})."
+                )
+            
+            # Eligibility excludes pairs that won in any round, which the
+            # round's own version cannot see, so re-check the chosen pairs
+            placeholders = ','.join(['?'] * len(participant_ids))
+            already_won = conn.execute(f'''
+                SELECT COUNT(*) FROM participants p
+                JOIN participants q
+                    ON q.mobile_number = p.mobile_number AND q.unique_code = p.unique_code
+                JOIN winners w ON w.participant_id = q.id
+                WHERE p.id IN ({placeholders})
+            ''', list(participant_ids)).fetchone()[0]
+            if already_won:
+                raise StaleDrawError(
+                    f"Round {round_number} changed while winners were being selected "
+                    f"(a selected participant has won in another draw)."
+                )
+            
+            selection_date = datetime.now()
+            conn.executemany(
+                '''
+                INSERT INTO winners
+                (participant_id, round_number, source, selection_date)
+                VALUES (?, ?, ?, ?)
+                ''',
+                [(pid, round_number, source, selection_date) for pid in participant_ids]
+            )
+            
+            if audit is None:
+                return None
+            
+            last = conn.execute("SELECT entry_hash FROM draw_audit ORDER BY id DESC LIMIT 1").fetchone()
+            prev_hash = last[0] if last else GENESIS_HASH
+            params = json.dumps(audit['params'], sort_keys=True, separators=(',', ':'))
+            winner_ids = json.dumps(list(participant_ids), separators=(',', ':'))
+            created_at = selection_date.isoformat()
+            values = (
+                round_number, audit['seed'], audit['eligible_count'], audit['eligible_digest'],
+                params, winner_ids, created_at
+            )
+            cursor = conn.execute(
+                '''
+                INSERT INTO draw_audit
+                (round_number, seed, eligible_count, eligible_digest, params, winner_ids,
+                 created_at, prev_hash, entry_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                values + (prev_hash, entry_hash(prev_hash, *values))
+            )
+            return cursor.lastrowid
+        
+        return self.writer.submit(run)
+    
+    def iter_audit_entries(self, after_id=0):
+        """Yield draw_audit rows with id greater than after_id, in chain order."""
+        conn = self.connect()
+        try:
+            yield from conn.execute('''
+                SELECT id, round_number, seed, eligible_count, eligible_digest, params, winner_ids,
+                       created_at, prev_hash, entry_hash
+                FROM draw_audit WHERE id > ? ORDER BY id
+            ''', (after_id,))
+        finally:
+            conn.close()
+    
+    def get_audit_checkpoint(self):
+        """Get (audit_id, entry_hash) of the last verified audit entry."""
+        results, _ = self.execute_query("SELECT audit_id, entry_hash FROM draw_audit_checkpoint WHERE id = 1")
+        return results[0] if results else (0, GENESIS_HASH)
+    
+    def set_audit_checkpoint(self, audit_id, audit_hash):
+        """Record the last verified audit entry."""
+        self.execute_query('''
+            INSERT INTO draw_audit_checkpoint (id, audit_id, entry_hash) VALUES (1, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET audit_id = excluded.audit_id, entry_hash = excluded.entry_hash
+        ''', (audit_id, audit_hash))
+    
     def get_existing_winners(self):
         """Get mobile numbers of all existing winners."""
         query = '''
@@ -139,3 +521,86 @@ class Database:
             'unique_code': [row[1] for row in results]
         }
         return winners
+
+    def lookup_participants(self, term, field="mobile_number", prefix=False, page_size=50, after=None):
+        """Look up participants by mobile number or unique code.
+        
+        An exact match uses the column index directly and a prefix match walks
+        an index range. Results are ordered by (field, id) and paged with a
+        keyset cursor: pass the returned next_cursor as `after` to fetch the
+        following page. next_cursor is None on the last page.
+        """
+        if field not in ("mobile_number", "unique_code"):
+            raise ValueError(f"Cannot look up participants by '{field}'.")
+        
+        term = str(term).strip()
+        if not term:
+            return [], None
+        
+        if prefix:
+            # Half-open range [term, upper) so SQLite can use the index
+            upper = term[:-1] + chr(ord(term[-1]) + 1)
+            conditions = [f"p.{field} >= ?", f"p.{field} < ?"]
+            params = [term, upper]
+        else:
+            conditions = [f"p.{field} = ?"]
+            params = [term]
+        
+        if after is not None:
+            last_value, last_id = after
+            conditions.append(f"(p.{field}, p.id) > (?, ?)")
+            params.extend([last_value, last_id])
+        
+        query = f'''
+            SELECT p.id, p.mobile_number, p.unique_code, p.message, p.source, p.round_number,
+                   (SELECT group_concat(w.round_number, ', ') FROM winners w
+                    WHERE w.participant_id = p.id) AS won_rounds
+            FROM participants p
+            WHERE {' AND '.join(conditions)}
+            ORDER BY p.{field}, p.id
+            LIMIT ?
+        '''
+        params.append(page_size + 1)
+        results, _ = self.execute_query(query, params)
+        
+        rows = results[:page_size]
+        next_cursor = None
+        if len(results) > page_size:
+            last = rows[-1]
+            next_cursor = (last[1] if field == "mobile_number" else last[2], last[0])
+        return rows, next_cursor
+    
+    def search_messages(self, keywords, page_size=50, after=None):
+        """Full-text search over participant messages.
+        
+        Every keyword must appear in the message. Results are ordered by
+        participant id and paged with a keyset cursor like lookup_participants.
+        """
+        tokens = str(keywords).split()
+        if not tokens:
+            return [], None
+        
+        # Quote each keyword so user input is never parsed as FTS5 syntax
+        match = ' '.join('"' + token.replace('"', '""') + '"' for token in tokens)
+        params = [match]
+        cursor_condition = ''
+        if after is not None:
+            cursor_condition = 'AND f.rowid > ?'
+            params.append(after)
+        
+        query = f'''
+            SELECT p.id, p.mobile_number, p.unique_code, p.message, p.source, p.round_number,
+                   (SELECT group_concat(w.round_number, ', ') FROM winners w
+                    WHERE w.participant_id = p.id) AS won_rounds
+            FROM participants_fts f
+            JOIN participants p ON p.id = f.rowid
+            WHERE participants_fts MATCH ? {cursor_condition}
+            ORDER BY f.rowid
+            LIMIT ?
+        '''
+        params.append(page_size + 1)
+        results, _ = self.execute_query(query, params)
+        
+        rows = results[:page_size]
+        next_cursor = rows[-1][0] if len(results) > page_size else None
+        return rows, next_cursor
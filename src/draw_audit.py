@@ -0,0 +1,117 @@
+import hashlib
+import json
+import random
+
+# prev_hash of the first entry in the chain
+GENESIS_HASH = "0" * 64
+
+
+def digest_ids(ids):
+    """Hash an iterable of sorted participant ids without materializing it.
+
+    Returns (count, hex digest).
+    """
+    digest = hashlib.sha256()
+    count = 0
+    for participant_id in ids:
+        digest.update(f"{participant_id}\n".encode())
+        count += 1
+    return count, digest.hexdigest()
+
+
+def entry_hash(prev_hash, round_number, seed, eligible_count, eligible_digest, params, winner_ids, created_at):
+    """Hash one audit entry together with the hash of the entry before it."""
+    payload = json.dumps(
+        [prev_hash, round_number, seed, eligible_count, eligible_digest, params, winner_ids, created_at],
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay_sample(seed, eligible_ids, num_winners):
+    """Deterministically pick winners from the sorted eligible ids."""
+    return random.Random(int(seed)).sample(eligible_ids, num_winners)
+
+
+class DrawAudit:
+    """Replay recorded draws and verify the hash chain of the draw_audit table."""
+
+    def __init__(self, database):
+        self.database = database
+
+    def verify_draw(self, audit_id):
+        """Replay one draw and check it against its audit entry."""
+        rows, _ = self.database.execute_query('''
+            SELECT round_number, seed, eligible_count, eligible_digest, params, winner_ids
+            FROM draw_audit WHERE id = ?
+        ''', (audit_id,))
+        if not rows:
+            return False, f"Draw audit #{audit_id} not found."
+
+        round_number, seed, eligible_count, eligible_digest, params, winner_ids = rows[0]
+        params = json.loads(params)
+        winner_ids = json.loads(winner_ids)
+
+        # Rebuild the eligibility set as it was when the draw was taken
+        eligible_ids = list(self.database.iter_eligible_ids(
+            round_number, params["last_participant_id"], params["last_winner_id"]
+        ))
+        count, digest = digest_ids(eligible_ids)
+        if (count, digest) != (eligible_count, eligible_digest):
+            return False, f"Draw audit #{audit_id}: eligibility set does not match the recorded digest."
+
+        if replay_sample(seed, eligible_ids, params["num_winners"]) != winner_ids:
+            return False, f"Draw audit #{audit_id}: replaying the seed does not give the recorded winners."
+
+        recorded, _ = self.database.execute_query(f'''
+            SELECT COUNT(*) FROM winners
+            WHERE round_number = ? AND participant_id IN ({','.join(['?'] * len(winner_ids))})
+        ''', [round_number] + winner_ids)
+        if recorded[0][0] != len(winner_ids):
+            return False, f"Draw audit #{audit_id}: winners table does not contain every drawn participant."
+
+        return True, f"Draw audit #{audit_id} replayed successfully ({len(winner_ids)} winners from {count} eligible)."
+
+    def verify_chain(self, full=False):
+        """Check the hash chain of the audit log.
+
+        Entries before the last verified checkpoint are trusted unless full
+        is True, so a routine check re-hashes the checkpoint entry and the
+        entries added since then. The checkpoint is advanced when the check
+        passes.
+        """
+        checkpoint_id, prev_hash = 0, GENESIS_HASH
+        if not full:
+            checkpoint_id, prev_hash = self.database.get_audit_checkpoint()
+
+        entries = self.database.iter_audit_entries(after_id=max(checkpoint_id - 1, 0))
+        if checkpoint_id:
+            # The checkpoint entry is hashed again so an edit to it (with the
+            # stored hash left alone) still breaks the check
+            anchor = next(entries, None)
+            if anchor is None or anchor[0] != checkpoint_id or \
+                    anchor[-1] != prev_hash or entry_hash(anchor[-2], *anchor[1:8]) != prev_hash:
+                entries.close()
+                return False, f"Draw audit #{checkpoint_id} no longer matches the verified checkpoint."
+
+        last_id = checkpoint_id
+        checked = 0
+        for row in entries:
+            audit_id, round_number, seed, eligible_count, eligible_digest, params, winner_ids, \
+                created_at, stored_prev_hash, stored_hash = row
+            if stored_prev_hash != prev_hash:
+                entries.close()
+                return False, f"Draw audit #{audit_id} is not linked to the entry before it."
+            expected_hash = entry_hash(
+                prev_hash, round_number, seed, eligible_count, eligible_digest, params, winner_ids, created_at
+            )
+            if stored_hash != expected_hash:
+                entries.close()
+                return False, f"Draw audit #{audit_id} has been modified."
+            prev_hash = stored_hash
+            last_id = audit_id
+            checked += 1
+
+        if last_id != checkpoint_id:
+            self.database.set_audit_checkpoint(last_id, prev_hash)
+        return True, f"Draw audit chain verified ({checked} new entries checked)."
@@ -1,37 +1,62 @@
-import random
+import secrets
 from datetime import datetime
 
+from src.database import StaleDrawError
+from src.draw_audit import replay_sample
+
 class WinnerManager:
     def __init__(self, database):
         self.database = database
         
+    def draw_winners(self, round_number, num_winners):
+        """Draw WhatsApp winners for a round and record them with an audit entry.
+        
+        Returns the draw audit id. Raises ValueError when there are not enough
+        eligible participants and StaleDrawError when another operator changed
+        the eligible set before the draw was saved.
+        """
+        # Read the round version, the eligible participants (those whose
+        # mobile_number and unique_code pair has not won before) and the
+        # bounds needed to rebuild them from one consistent snapshot
+        snapshot = self.database.get_draw_snapshot(round_number)
+        eligible_ids = snapshot['eligible_ids']
+        
+        if len(eligible_ids) < num_winners:
+            raise ValueError(f"Not enough unique participants to select {num_winners} winners.")
+        
+        # Randomly select winners with a recorded seed so the draw can be replayed
+        seed = secrets.randbits(63)
+        participant_ids = replay_sample(seed, eligible_ids, num_winners)
+        
+        # Add selected winners and the audit entry to the database, unless
+        # another operator changed the eligible set since the snapshot was taken
+        return self.database.commit_draw(
+            round_number, snapshot['version'], participant_ids, "WhatsApp",
+            audit={
+                'seed': seed,
+                'eligible_count': snapshot['eligible_count'],
+                'eligible_digest': snapshot['eligible_digest'],
+                'params': {
+                    'num_winners': num_winners,
+                    'source': "WhatsApp",
+                    'draw_version': snapshot['version'],
+                    'last_participant_id': snapshot['last_participant_id'],
+                    'last_winner_id': snapshot['last_winner_id'],
+                },
+            }
+        )
+    
     def select_whatsapp_winners(self, round_number, num_winners):
         """Select unique winners based on both mobile_number and unique_code."""
         try:
-            # Fetch all participants for the round
-            participants = self.database.get_participants_by_round(round_number, "WhatsApp")
-            
-            # Fetch all previous winners
-            previous_winners = self.database.get_all_winners()
-            
-            # Filter out participants who are already winners based on mobile_number and unique_code
-            previous_winner_keys = set(zip(previous_winners['mobile_number'], previous_winners['unique_code']))
-            
-            # The participants are tuples with values (id, mobile_number, unique_code, message, date_added)
-            # We need to access by index, not by string key
-            eligible_participants = [p for p in participants if (p[1], p[2]) not in previous_winner_keys]
-            
-            if len(eligible_participants) < num_winners:
-                return False, f"Not enough unique participants to select {num_winners} winners."
-            
-            # Randomly select winners
-            selected_winners = random.sample(eligible_participants, num_winners)
-            
-            # Add selected winners to the database
-            for winner in selected_winners:
-                participant_id = winner[0]  # Access ID by index 0
-                self.database.add_winner(participant_id, round_number, "WhatsApp")
-            
-            return True, f"Successfully selected {num_winners} WhatsApp winners for round {round_number}."
+            audit_id = self.draw_winners(round_number, num_winners)
+            return True, (
+                f"Successfully selected {num_winners} WhatsApp winners for round {round_number} "
+                f"(draw audit #{audit_id})."
+            )
+        except ValueError as e:
+            return False, str(e)
+        except StaleDrawError as e:
+            return False, f"{str(e)} No winners were saved, please select again."
         except Exception as e:
-            return False, f"Error selecting winners: {str(e)}"
\ No newline at end of file
+            return False, f"Error selecting winners: {str(e)}"
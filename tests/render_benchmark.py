@@ -0,0 +1,133 @@
+"""Benchmark duplicate-highlight rendering time against winner count.
+
+Times building the duplicate columns and the styled payload for the
+View Winners tables, and compares it with the previous row-by-row code
+for smaller histories.
+
+    python -m tests.render_benchmark --counts 1000 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ui.components.winner_tables import (
+    DUPLICATE_STYLE, HIGHLIGHT_STYLE, mark_all_duplicates, mark_round_duplicates, style_page
+)
+
+
+def make_winners(count, rounds=10, seed=0):
+    """Synthetic winner history with some repeated mobiles and codes."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'mobile_number': (94770000000 + rng.integers(0, count * 2, count)).astype(str),
+        'unique_code': 'C' + pd.Series(rng.integers(0, count * 2, count)).astype(str),
+        'message': 'benchmark entry',
+        'source': rng.choice(['WhatsApp', 'Post'], count),
+        'round_number': rng.integers(1, rounds + 1, count),
+    })
+    return df.sort_values(['round_number', 'source'], kind='stable').reset_index(drop=True)
+
+
+def render_current(all_winners, round_number):
+    """Build both tables the way view_winners_page now does."""
+    winners_df = all_winners[all_winners['round_number'] == round_number].reset_index(drop=True)
+    winners_df = mark_round_duplicates(
+        winners_df, all_winners[['mobile_number', 'unique_code', 'round_number']], round_number
+    )
+    style_page(winners_df, 1, HIGHLIGHT_STYLE).to_html()
+
+    display_df = mark_all_duplicates(all_winners)
+    style_page(display_df[display_df['is_duplicate']], 1, DUPLICATE_STYLE).to_html()
+
+
+def previous_round_duplicates(winners_df, all_winners, round_number):
+    """The row-by-row marking mark_round_duplicates replaced."""
+    winners_df = winners_df.copy()
+    winners_df['is_duplicate'] = False
+    winners_df['previous_rounds'] = ''
+    winners_df['duplicate_reason'] = ''
+    for idx, row in winners_df.iterrows():
+        mobile_rounds = all_winners[
+            (all_winners['mobile_number'] == row['mobile_number']) &
+            (all_winners['round_number'] != round_number)
+        ]['round_number'].tolist()
+        code_rounds = all_winners[
+            (all_winners['unique_code'] == row['unique_code']) &
+            (all_winners['round_number'] != round_number)
+        ]['round_number'].tolist()
+        all_rounds = sorted(set(mobile_rounds + code_rounds))
+        if all_rounds:
+            winners_df.at[idx, 'is_duplicate'] = True
+            winners_df.at[idx, 'previous_rounds'] = ', '.join(map(str, all_rounds))
+            reasons = []
+            if mobile_rounds:
+                reasons.append(f"Same mobile in rounds: {', '.join(map(str, mobile_rounds))}")
+            if code_rounds:
+                reasons.append(f"Same code in rounds: {', '.join(map(str, code_rounds))}")
+            winners_df.at[idx, 'duplicate_reason'] = "; ".join(reasons)
+    return winners_df
+
+
+def previous_all_duplicates(all_winners_df):
+    """The per-group marking mark_all_duplicates replaced."""
+    display_df = all_winners_df.copy()
+    display_df['is_duplicate'] = False
+    display_df['duplicate_reason'] = ""
+    for key, label in [('mobile_number', 'mobile'), ('unique_code', 'code')]:
+        duplicates = display_df[display_df.duplicated(subset=[key], keep=False)]
+        for _, group in duplicates.groupby(key):
+            rounds = group['round_number'].tolist()
+            for index in group.index:
+                display_df.at[index, 'is_duplicate'] = True
+                current_round = display_df.at[index, 'round_number']
+                other_rounds = [r for r in rounds if r != current_round]
+                if other_rounds:
+                    reason = f"Same {label} in round(s): {', '.join(map(str, other_rounds))}"
+                    if display_df.at[index, 'duplicate_reason']:
+                        display_df.at[index, 'duplicate_reason'] += "; " + reason
+                    else:
+                        display_df.at[index, 'duplicate_reason'] = reason
+    return display_df
+
+
+def render_previous(all_winners, round_number):
+    """The previous marking with the whole table styled row by row."""
+    winners_df = all_winners[all_winners['round_number'] == round_number].reset_index(drop=True)
+    winners_df = previous_round_duplicates(winners_df, all_winners, round_number)
+    winners_df.style.apply(
+        lambda x: [HIGHLIGHT_STYLE if x['is_duplicate'] else '' for _ in x], axis=1
+    ).to_html()
+
+    display_df = previous_all_duplicates(all_winners)
+    display_df[display_df['is_duplicate']].style.apply(
+        lambda x: [DUPLICATE_STYLE if x['is_duplicate'] else '' for _ in x], axis=1
+    ).to_html()
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--previous-max", type=int, default=10000,
+                        help="Largest winner count to also time the previous code with")
+    args = parser.parse_args()
+
+    print(f"{'winners':>10} {'current ms':>12} {'previous ms':>12}")
+    for count in args.counts:
+        all_winners = make_winners(count)
+        current = time_call(render_current, all_winners, 1)
+        previous = ''
+        if count <= args.previous_max:
+            previous = f"{time_call(render_previous, all_winners, 1) * 1000:.1f}"
+        print(f"{count:>10} {current * 1000:>12.1f} {previous:>12}")
+
+
+if __name__ == "__main__":
+    main()
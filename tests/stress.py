@@ -0,0 +1,140 @@
+"""Concurrency stress test for the database write queue and draw locking.
+
+Runs many threads doing a mix of imports, winner selections and views
+against a scratch database, then reports throughput and p99 latency per
+operation and checks that no (mobile number, unique code) pair was drawn
+twice, in the same round or across rounds.
+
+    python -m tests.stress --threads 16 --seconds 10
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from src.database import Database, StaleDrawError
+from src.winner_manager import WinnerManager
+
+# Source of unique participant keys shared by all worker threads
+_keys = itertools.count()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def import_batch(database, rounds, batch_size):
+    """Import a batch of new participants into every round.
+    
+    Each pair is unique within a round but entered in all of them, so
+    concurrent draws of different rounds compete for the same people.
+    """
+    keys = [next(_keys) for _ in range(batch_size)]
+    entries = [(f"9477{key:07d}", f"C{key:07d}", "stress test entry") for key in keys]
+    for round_number in range(1, rounds + 1):
+        database.add_participants(entries, "WhatsApp", round_number)
+
+
+def view_round(database, round_number):
+    """Read the winners of a round the way the view page does."""
+    database.execute_query('''
+        SELECT p.mobile_number, p.unique_code, p.message, p.source, w.round_number
+        FROM participants p
+        JOIN winners w ON p.id = w.participant_id
+        WHERE w.round_number = ?
+    ''', (round_number,))
+
+
+def run_stress_test(db_path, threads=16, seconds=10.0, rounds=3, batch_size=20, winners_per_draw=2):
+    """Run the mixed workload and return (latencies, outcomes, elapsed)."""
+    database = Database(db_path)
+    winner_manager = WinnerManager(database)
+
+    # Seed every round so draws have something to pick from
+    import_batch(database, rounds, batch_size * 5)
+
+    latencies = defaultdict(list)
+    outcomes = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        while time.perf_counter() < deadline:
+            round_number = random.randint(1, rounds)
+            operation = random.choices(["import", "select", "view"], weights=[2, 3, 5])[0]
+
+            start = time.perf_counter()
+            if operation == "import":
+                import_batch(database, rounds, batch_size)
+                outcome = "import ok"
+            elif operation == "select":
+                try:
+                    winner_manager.draw_winners(round_number, winners_per_draw)
+                    outcome = "select ok"
+                except StaleDrawError:
+                    outcome = "select stale"
+                except ValueError:
+                    outcome = "select short"
+            else:
+                view_round(database, round_number)
+                outcome = "view ok"
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                latencies[operation].append(elapsed)
+                outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # The same person must never be recorded as a winner twice
+    duplicates, _ = database.execute_query('''
+        SELECT p.mobile_number, p.unique_code, COUNT(*) FROM winners w
+        JOIN participants p ON p.id = w.participant_id
+        GROUP BY p.mobile_number, p.unique_code HAVING COUNT(*) > 1
+    ''')
+    outcomes["duplicate winners"] = len(duplicates)
+
+    return latencies, outcomes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "stress.db")
+        latencies, outcomes, elapsed = run_stress_test(
+            db_path, threads=args.threads, seconds=args.seconds, rounds=args.rounds
+        )
+
+    total_ops = sum(len(values) for values in latencies.values())
+    print(f"{args.threads} threads, {elapsed:.1f}s, {total_ops / elapsed:.1f} ops/s overall")
+    for operation, values in sorted(latencies.items()):
+        print(
+            f"  {operation:<7} {len(values):>6} ops  {len(values) / elapsed:>8.1f} ops/s  "
+            f"p50 {percentile(values, 50) * 1000:>7.1f} ms  p99 {percentile(values, 99) * 1000:>7.1f} ms"
+        )
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<18} {count}")
+
+
+if __name__ == "__main__":
+    main()
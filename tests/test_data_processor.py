@@ -0,0 +1,96 @@
+import io
+
+import pandas as pd
+import pytest
+
+from src.data_processor import DataProcessor
+from src.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(str(tmp_path / "database" / "contest_winners.db"))
+
+
+@pytest.fixture
+def processor(database, tmp_path, monkeypatch):
+    # DataProcessor creates its data/ and exports/ folders in the working directory
+    monkeypatch.chdir(tmp_path)
+    return DataProcessor(database)
+
+
+def make_sheet(rows):
+    buffer = io.BytesIO()
+    pd.DataFrame(rows, columns=["mobile number", "Unique Code", "SMS"]).to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def test_validate_entries_classifies_rows(processor):
+    df = pd.DataFrame({
+        "mobile number": ["0771234567", None, "77-abc", "0771234567", "94771234567", "0772222222"],
+        "Unique Code": ["A1", "B2", "C3", "A1", "A1", "D 4"],
+        "SMS": ["hi", "hi", "hi", "again", "hi", None],
+    })
+    entries = processor.validate_entries(df)
+
+    assert entries['row'].tolist() == [2, 3, 4, 5, 6, 7]
+    assert entries['status'].tolist() == [
+        'accepted', 'rejected', 'rejected', 'duplicate', 'duplicate', 'rejected'
+    ]
+    assert entries['reason'].tolist()[1:] == [
+        "Blank mobile number",
+        "Malformed mobile number",
+        "Duplicate of an earlier row in this sheet",
+        "Duplicate of an earlier row in this sheet",
+        "Malformed unique code; Missing SMS",
+    ]
+
+
+def test_validate_entries_canonicalizes_mobile_numbers(processor):
+    numeric = processor.validate_entries(pd.DataFrame({
+        "mobile number": [771234570, 94771234571],
+        "Unique Code": ["A1", "B2"],
+        "SMS": ["hi", "hi"],
+    }))
+    text = processor.validate_entries(pd.DataFrame({
+        "mobile number": ["0771234570", "+94771234570", "94771234570"],
+        "Unique Code": ["A1", "B2", "C3"],
+        "SMS": ["hi", "hi", "hi"],
+    }))
+
+    assert numeric['mobile_number'].tolist() == ["94771234570", "94771234571"]
+    assert text['mobile_number'].tolist() == ["94771234570"] * 3
+    assert text['entered_mobile'].tolist() == ["0771234570", "+94771234570", "94771234570"]
+
+
+def test_post_import_links_winners_and_does_not_need_sms(processor, database):
+    processor.import_whatsapp_data(make_sheet([["0771111111", "A1", "hi"]]), 1)
+    success, _ = processor.import_post_winners(make_sheet([
+        ["0772222222", "P1", None],
+        ["0773333333", "P2", "by post"],
+    ]), 1)
+
+    assert success
+    results, _ = database.execute_query('''
+        SELECT p.mobile_number, p.unique_code, w.round_number
+        FROM winners w JOIN participants p ON p.id = w.participant_id
+        WHERE p.source = 'Post'
+        ORDER BY p.id
+    ''')
+    assert [tuple(row) for row in results] == [("94772222222", "P1", 1), ("94773333333", "P2", 1)]
+    assert processor.get_rejection_report_csv("Post") is None
+
+
+def test_rejection_report_shows_entered_and_normalized_text(processor):
+    processor.import_whatsapp_data(make_sheet([
+        [771234567, "A1", "hi"],
+        [771234567, "A1", "again"],
+        [None, "B2", "hi"],
+    ]), 1)
+
+    report = pd.read_csv(io.BytesIO(processor.get_rejection_report_csv("WhatsApp")), dtype=str, keep_default_na=False)
+    assert report['row'].tolist() == ["3", "4"]
+    assert report['mobile number'].tolist() == ["771234567", ""]
+    assert report['normalized mobile number'].tolist() == ["94771234567", ""]
+    assert report['status'].tolist() == ["duplicate", "rejected"]
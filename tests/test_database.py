@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from src.database import Database, StaleDrawError
+
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(str(tmp_path / "database" / "contest_winners.db"))
+
+
+def count_winners(database):
+    results, _ = database.execute_query("SELECT COUNT(*) FROM winners")
+    return results[0][0]
+
+
+def test_stale_commit_draw_raises_and_writes_no_winners(database):
+    database.add_participants([("94771111111", "A1", "hi"), ("94772222222", "B2", "hi")], "WhatsApp", 1)
+    snapshot = database.get_draw_snapshot(1)
+
+    # Another operator imports into the round after the snapshot was taken
+    database.add_participants([("94773333333", "C3", "hi")], "WhatsApp", 1)
+
+    with pytest.raises(StaleDrawError):
+        database.commit_draw(1, snapshot['version'], snapshot['eligible_ids'][:1], "WhatsApp")
+    assert count_winners(database) == 0
+
+
+def test_concurrent_draws_of_different_rounds_cannot_pick_the_same_pair(database):
+    database.add_participants([("771111111", "X1", "hi")], "WhatsApp", 1)
+    database.add_participants([("771111111", "X1", "hi")], "WhatsApp", 2)
+    round_1 = database.get_draw_snapshot(1)
+    round_2 = database.get_draw_snapshot(2)
+
+    database.commit_draw(1, round_1['version'], round_1['eligible_ids'], "WhatsApp")
+    with pytest.raises(StaleDrawError):
+        database.commit_draw(2, round_2['version'], round_2['eligible_ids'], "WhatsApp")
+    assert count_winners(database) == 1
+
+
+def test_commit_draw_accepts_a_fresh_snapshot(database):
+    database.add_participants([("94771111111", "A1", "hi")], "WhatsApp", 1)
+    snapshot = database.get_draw_snapshot(1)
+
+    database.commit_draw(1, snapshot['version'], snapshot['eligible_ids'], "WhatsApp")
+    assert count_winners(database) == 1
+    assert database.get_draw_snapshot(1)['eligible_ids'] == []
+
+
+def test_constructing_database_does_not_wait_for_queued_writes(database):
+    release = threading.Event()
+    blocker = threading.Thread(target=database.writer.submit, args=(lambda conn: release.wait(),))
+    blocker.start()
+    try:
+        start = time.perf_counter()
+        Database(database.db_path)
+        assert time.perf_counter() - start < 1
+    finally:
+        release.set()
+        blocker.join()
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from src.database import Database
+from src.draw_audit import DrawAudit
+from src.winner_manager import WinnerManager
+
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(str(tmp_path / "database" / "contest_winners.db"))
+
+
+def add_entries(database, round_number, start, count):
+    database.add_participants(
+        [(f"9477{n:07d}", f"C{n}", "hi") for n in range(start, start + count)], "WhatsApp", round_number
+    )
+
+
+def tampered_copy(database, tmp_path, audit_id):
+    """Copy the database, drop the append-only trigger and edit one audit entry."""
+    path = str(tmp_path / "tampered.db")
+    source = sqlite3.connect(database.db_path)
+    target = sqlite3.connect(path)
+    source.backup(target)
+    source.close()
+    target.execute("DROP TRIGGER draw_audit_no_update")
+    target.execute("UPDATE draw_audit SET eligible_count = eligible_count + 1 WHERE id = ?", (audit_id,))
+    target.commit()
+    target.close()
+    return Database(path)
+
+
+@pytest.fixture
+def drawn(database):
+    add_entries(database, 1, 0, 20)
+    winner_manager = WinnerManager(database)
+    winner_manager.draw_winners(1, 3)
+    winner_manager.draw_winners(1, 3)
+    return database
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test_verify_chain_detects_an_edited_checkpoint_entry(drawn, tmp_path, full):
+    assert DrawAudit(drawn).verify_chain()[0]
+
+    success, _ = DrawAudit(tampered_copy(drawn, tmp_path, 2)).verify_chain(full=full)
+    assert not success
+
+
+def test_full_verification_detects_an_edit_before_the_checkpoint(drawn, tmp_path):
+    assert DrawAudit(drawn).verify_chain()[0]
+
+    draw_audit = DrawAudit(tampered_copy(drawn, tmp_path, 1))
+    assert draw_audit.verify_chain()[0]
+    assert not draw_audit.verify_chain(full=True)[0]
+
+
+def test_verify_draw_replays_after_later_imports_and_draws(database):
+    winner_manager = WinnerManager(database)
+    add_entries(database, 1, 0, 10)
+    first = winner_manager.draw_winners(1, 3)
+
+    add_entries(database, 1, 10, 10)
+    add_entries(database, 2, 0, 10)
+    later = [winner_manager.draw_winners(1, 3), winner_manager.draw_winners(2, 3)]
+
+    draw_audit = DrawAudit(database)
+    for audit_id in [first] + later:
+        success, message = draw_audit.verify_draw(audit_id)
+        assert success, message
+    assert draw_audit.verify_chain(full=True)[0]
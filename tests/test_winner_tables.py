@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from tests.render_benchmark import make_winners, previous_all_duplicates, previous_round_duplicates
+from ui.components.winner_tables import mark_all_duplicates, mark_round_duplicates, page_count, style_page
+
+
+@pytest.mark.parametrize("count", [50, 500, 3000])
+@pytest.mark.parametrize("round_number", [1, 4])
+def test_mark_round_duplicates_matches_previous_logic(count, round_number):
+    all_winners = make_winners(count, rounds=5, seed=count)
+    winners_df = all_winners[all_winners['round_number'] == round_number].reset_index(drop=True)
+    history = all_winners[['mobile_number', 'unique_code', 'round_number']]
+
+    pd.testing.assert_frame_equal(
+        mark_round_duplicates(winners_df, history, round_number),
+        previous_round_duplicates(winners_df, history, round_number),
+        check_dtype=False
+    )
+
+
+@pytest.mark.parametrize("count", [50, 500, 3000])
+def test_mark_all_duplicates_matches_previous_logic(count):
+    all_winners = make_winners(count, rounds=5, seed=count)
+
+    pd.testing.assert_frame_equal(
+        mark_all_duplicates(all_winners), previous_all_duplicates(all_winners), check_dtype=False
+    )
+
+
+def test_style_page_slices_one_page():
+    df = mark_all_duplicates(make_winners(250))
+
+    assert page_count(df) == 3
+    assert len(style_page(df, 3, 'color: red').data) == 50
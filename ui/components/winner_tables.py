@@ -0,0 +1,146 @@
+"""Duplicate highlighting for the winner tables on the View Winners page.
+
+The duplicate flags and reason strings are built with merges and grouped
+string joins over whole columns, and only the page of rows on screen is
+styled before it is sent to Streamlit as one dataframe payload.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZE = 100
+HIGHLIGHT_STYLE = 'background-color: #8a64d6'
+DUPLICATE_STYLE = 'color: red; font-weight: bold'
+
+
+def _matching_rounds(df, history, key):
+    """Pair each row of df with the rounds of history rows sharing key in another round.
+
+    Returns a DataFrame with the df index in 'row' and the other round in 'round_number'.
+    """
+    left = pd.DataFrame({
+        'row': df.index,
+        key: df[key].to_numpy(),
+        'own_round': df['round_number'].to_numpy(),
+    })
+    pairs = left.merge(history[[key, 'round_number']], on=key, how='inner')
+    return pairs.loc[pairs['round_number'] != pairs['own_round'], ['row', 'round_number']]
+
+
+def _join_rounds(pairs, index):
+    """Join the rounds of each row as '1, 2, 3', with '' for rows without any."""
+    if pairs.empty:
+        return pd.Series('', index=index, dtype=object)
+    pairs = pairs.sort_values(['row', 'round_number'])
+    rows = pairs['row'].to_numpy()
+    rounds = pairs['round_number'].to_numpy().astype(str).tolist()
+
+    # Group boundaries come from one comparison over the sorted rows, which
+    # avoids pandas' per-group overhead when there are many duplicates
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+    text = [', '.join(rounds[start:end]) for start, end in zip(starts.tolist(), ends.tolist())]
+    return pd.Series(text, index=rows[starts], dtype=object).reindex(index, fill_value='')
+
+
+def _reasons(mobile_rounds, code_rounds, mobile_label, code_label):
+    """Build the duplicate reason column from the per-row round lists."""
+    mobile_part = (mobile_label + mobile_rounds).where(mobile_rounds != '', '')
+    code_part = (code_label + code_rounds).where(code_rounds != '', '')
+    separator = np.where((mobile_part != '') & (code_part != ''), '; ', '')
+    return mobile_part + separator + code_part
+
+
+def mark_round_duplicates(winners_df, all_winners, round_number):
+    """Flag winners of a round who also won in another round.
+
+    Adds is_duplicate, previous_rounds and duplicate_reason columns.
+    """
+    winners_df = winners_df.copy()
+    history = all_winners[all_winners['round_number'] != round_number]
+
+    by_mobile = _matching_rounds(winners_df, history, 'mobile_number')
+    by_code = _matching_rounds(winners_df, history, 'unique_code')
+    previous_rounds = _join_rounds(
+        pd.concat([by_mobile, by_code]).drop_duplicates(), winners_df.index
+    )
+
+    winners_df['is_duplicate'] = previous_rounds != ''
+    winners_df['previous_rounds'] = previous_rounds
+    winners_df['duplicate_reason'] = _reasons(
+        _join_rounds(by_mobile, winners_df.index),
+        _join_rounds(by_code, winners_df.index),
+        "Same mobile in rounds: ",
+        "Same code in rounds: "
+    )
+    return winners_df
+
+
+def mark_all_duplicates(all_winners_df):
+    """Flag winners sharing a mobile number or unique code with any other winner.
+
+    Adds is_duplicate and duplicate_reason columns.
+    """
+    display_df = all_winners_df.copy()
+    mobile_dup = display_df.duplicated(subset=['mobile_number'], keep=False)
+    code_dup = display_df.duplicated(subset=['unique_code'], keep=False)
+
+    # Only rows that share a key with another row can have a reason
+    mobile_rows = display_df[mobile_dup]
+    code_rows = display_df[code_dup]
+
+    display_df['is_duplicate'] = mobile_dup | code_dup
+    display_df['duplicate_reason'] = _reasons(
+        _join_rounds(_matching_rounds(mobile_rows, mobile_rows, 'mobile_number'), display_df.index),
+        _join_rounds(_matching_rounds(code_rows, code_rows, 'unique_code'), display_df.index),
+        "Same mobile in round(s): ",
+        "Same code in round(s): "
+    )
+    return display_df
+
+
+def page_count(df, page_size=PAGE_SIZE):
+    """Number of pages needed to show df."""
+    return max(1, -(-len(df) // page_size))
+
+
+def style_page(df, page, style, page_size=PAGE_SIZE):
+    """Slice out one page of rows and style the rows flagged is_duplicate.
+
+    The CSS for the whole page is built in one vectorized call, so styling
+    cost depends on the page size rather than the table size.
+    """
+    start = (page - 1) * page_size
+    page_df = df.iloc[start:start + page_size]
+    if 'is_duplicate' not in page_df.columns:
+        return page_df
+
+    def css(frame):
+        row_css = np.where(frame['is_duplicate'].to_numpy(), style, '')
+        return pd.DataFrame(
+            np.repeat(row_css[:, None], frame.shape[1], axis=1),
+            index=frame.index,
+            columns=frame.columns
+        )
+
+    return page_df.style.apply(css, axis=None)
+
+
+def show_winner_table(df, key, style=HIGHLIGHT_STYLE):
+    """Show df one page at a time with duplicate rows highlighted."""
+    pages = page_count(df)
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (1-{pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page"
+        )
+
+    column_config = {
+        'is_duplicate': st.column_config.CheckboxColumn("Duplicate"),
+        'duplicate_reason': st.column_config.TextColumn("Duplicate Reason", width="large"),
+    }
+    st.dataframe(
+        style_page(df, page, style),
+        column_config={k: v for k, v in column_config.items() if k in df.columns},
+        use_container_width=True
+    )